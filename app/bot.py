@@ -2,9 +2,9 @@ import asyncio
 import os
 import re
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from pyrogram import Client, filters
+from pyrogram import Client, filters, idle
 
 
 proxy = dict(
@@ -16,10 +16,47 @@ proxy = dict(
 from pyrogram.types import Message
 
 from .config import API_ID, API_HASH, BOT_TOKEN, STORAGE_DIR, OWNER_ONLY, OWNER_ID
-from .db import alloc_id, put_item, get_item, del_item
-from .downloader import download_file, is_google_drive, is_mediafire
-from .fileops import list_dir, make_dir, zip_folder, zip_file, rename_rel, delete_rel
-from .utils import ensure_dir, pretty_size, safe_name, disk_usage
+from .db import (
+    SEARCH_COUNT_CAP,
+    alloc_id,
+    del_item,
+    get_item,
+    get_url,
+    list_items,
+    open_index,
+    put_item,
+    put_url,
+    search_items,
+    touch_item,
+)
+from .downloader import (
+    NotModified,
+    download_file,
+    guess_filename,
+    in_flight,
+    is_google_drive,
+    is_mediafire,
+    normalize_url,
+    resolve_url,
+    single_flight,
+)
+from .fileops import list_dir, make_dir, zip_folder, zip_file, delete_rel
+from .perf import monitor, percentile
+from .remotezip import fetch_remote_member, list_remote_zip
+from .tiering import (
+    ZST_SUFFIX,
+    drop_hot,
+    is_compressed,
+    local_path,
+    move_item,
+    path_taken,
+    release_local,
+    start_tiering,
+    stop_tiering,
+    stored_rel,
+    stored_size,
+)
+from .utils import ensure_dir, pretty_size, safe_name, disk_usage, parse_size, resolve_path
 
 BANNER = """😈 *Sasuke FileBot*
 
@@ -31,11 +68,14 @@ HELP = """😈 *Sasuke FileBot - Ayuda*
 
 *Descargar*
 • `/get <url> [carpeta]` descarga un link (directo, Drive, Mediafire)
+• `/ls-remote <url>` lista un ZIP remoto sin descargarlo entero
+• `/get-member <url> <ruta_en_zip> [carpeta]` descarga solo un archivo de un ZIP remoto
 • Envia un archivo de Telegram y lo guardo en el storage
 
 *Archivos*
 • `/ls [carpeta]` lista archivos/carpetas con tamaño
 • `/files` lista todos los archivos guardados por ID
+• `/find <texto> [ext:pdf] [size>10M] [size<1G] [after:2024-01-31] [before:2024-12-31] [in:carpeta]` buscar archivos
 • `/info <id>` info de un archivo
 • `/rm <id>` borrar archivo
 • `/rename <id> <nuevo_nombre>` renombrar
@@ -48,6 +88,7 @@ HELP = """😈 *Sasuke FileBot - Ayuda*
 
 *Sistema*
 • `/df` uso de disco
+• `/perf` lag del bot, llamadas que bloquean y latencia por comando
 
 Notas:
 • Los IDs empiezan en 0 y van subiendo.
@@ -61,21 +102,68 @@ def owner_guard():
     return filters.user(OWNER_ID)
 
 
+FIND_SIZE_RE = re.compile(r"^size([<>])=?(.+)$", re.IGNORECASE)
+
+
+def _parse_find_args(args) -> Tuple[str, dict]:
+    """Split /find arguments into (text, search_items filters)."""
+    words = []
+    filters_ = {}
+    for arg in args:
+        low = arg.lower()
+        m = FIND_SIZE_RE.match(arg)
+        if m:
+            key = "min_size" if m.group(1) == ">" else "max_size"
+            filters_[key] = parse_size(m.group(2))
+        elif low.startswith("ext:"):
+            filters_["ext"] = arg[4:]
+        elif low.startswith("after:"):
+            filters_["after"] = datetime.strptime(arg[6:], "%Y-%m-%d").timestamp()
+        elif low.startswith("before:"):
+            filters_["before"] = datetime.strptime(arg[7:], "%Y-%m-%d").timestamp()
+        elif low.startswith("in:"):
+            filters_["folder"] = arg[3:]
+        else:
+            words.append(arg)
+    return " ".join(words), filters_
+
+
 def _resolve_rel(folder_rel: str) -> str:
     folder_rel = (folder_rel or "").strip().strip("/")
     ensure_dir(folder_rel)
     return folder_rel
 
 
-def _unique_name(folder_abs: str, base_name: str) -> str:
+def _cold_sizes(folder_rel: str) -> Dict[str, int]:
+    """Abs path of each cold item's .zst under folder_rel -> original size."""
+    return {
+        resolve_path(stored_rel(v)): int(v.get("size", 0))
+        for v in list_items(folder_rel).values()
+        if is_compressed(v)
+    }
+
+
+def _reserve_name(folder_abs: str, base_name: str) -> str:
+    """Pick a free name in folder_abs and claim it with an empty placeholder file.
+
+    Creating it exclusively means two concurrent downloads can never pick the
+    same name, even though the data only lands there at the end.
+    """
     base_name = safe_name(base_name, default="download")
     name = base_name
     stem, ext = os.path.splitext(base_name)
     i = 1
-    while os.path.exists(os.path.join(folder_abs, name)):
-        name = f"{stem}_{i}{ext}"
-        i += 1
-    return name
+    while True:
+        path = os.path.join(folder_abs, name)
+        try:
+            if os.path.exists(path + ZST_SUFFIX):
+                # a cold item already owns this name
+                raise FileExistsError(path)
+            with open(path, "x"):
+                return name
+        except FileExistsError:
+            name = f"{stem}_{i}{ext}"
+            i += 1
 
 
 async def _progress_message(msg: Message, prefix: str, wrote: int, total: Optional[int]):
@@ -95,25 +183,81 @@ async def _progress_message(msg: Message, prefix: str, wrote: int, total: Option
             pass
 
 
+async def _download_to_item(url: str, direct: str, key: str, folder_rel: str, progress_cb) -> Tuple[int, bool]:
+    """Download `direct` into a new item, or reuse the stored copy on a 304.
+
+    Returns (item_id, reused).
+    """
+    cached = get_url(key)
+    item = get_item(cached["id"]) if cached else None
+    validators = {}
+    if item and os.path.exists(os.path.join(STORAGE_DIR, stored_rel(item))):
+        validators = {"etag": cached.get("etag"), "last_modified": cached.get("last_modified")}
+
+    folder_abs = ensure_dir(folder_rel)
+    dest = os.path.join(folder_abs, _reserve_name(folder_abs, guess_filename(url)))
+    try:
+        path, size, etag, last_modified, filename = await download_file(
+            direct, dest, progress_cb=progress_cb, resolve=False, **validators
+        )
+    except NotModified:
+        os.remove(dest)
+        return cached["id"], True
+    except BaseException:
+        os.remove(dest)
+        raise
+
+    # prefer the name the server gave (Content-Disposition) over the URL's
+    if filename and safe_name(filename, default="download") != os.path.basename(path):
+        final = os.path.join(folder_abs, _reserve_name(folder_abs, filename))
+        os.replace(path, final)
+        path = final
+
+    rel = os.path.relpath(path, STORAGE_DIR)
+    item_id = alloc_id()
+    put_item(item_id, rel, os.path.basename(rel), size)
+    put_url(key, item_id, etag, last_modified)
+    return item_id, False
+
+
+async def _fetch_url(url: str, folder_rel: str, progress_cb=None) -> Tuple[int, bool, bool]:
+    """Resolve `url` and download it once, however many /get ask for it at the same time.
+
+    Returns (item_id, reused, joined); joined means another /get was already
+    fetching the URL, so the item lives wherever that one asked for.
+    """
+    direct = await resolve_url(url)
+    key = normalize_url(direct)
+    joined = in_flight(key)
+    item_id, reused = await single_flight(
+        key, lambda: _download_to_item(url, direct, key, folder_rel, progress_cb)
+    )
+    return item_id, reused, joined
+
+
 app = Client(
     "sasuke_filebot",
     api_id=API_ID,
     api_hash=API_HASH,
     bot_token=BOT_TOKEN,
-, proxy=proxy)
+    proxy=proxy,
+)
 
 
 @app.on_message(filters.command(["start"]) & owner_guard())
+@monitor.timed
 async def start_cmd(_, message: Message):
     await message.reply_text(BANNER, disable_web_page_preview=True)
 
 
 @app.on_message(filters.command(["help"]) & owner_guard())
+@monitor.timed
 async def help_cmd(_, message: Message):
     await message.reply_text(HELP, disable_web_page_preview=True)
 
 
 @app.on_message(filters.command(["df"]) & owner_guard())
+@monitor.timed
 async def df_cmd(_, message: Message):
     total, used, free = disk_usage()
     await message.reply_text(
@@ -125,7 +269,131 @@ async def df_cmd(_, message: Message):
     )
 
 
+@app.on_message(filters.command(["get"]) & owner_guard())
+@monitor.timed
+async def get_cmd(_, message: Message):
+    if len(message.command) < 2:
+        return await message.reply_text("❌ Uso: `/get <url> [carpeta]`", quote=True)
+    url = message.command[1].strip()
+    folder = " ".join(message.command[2:]).strip()
+    prefix = "⏳ Descargando…"
+    if is_google_drive(url):
+        prefix = "⏳ Descargando de Google Drive…"
+    elif is_mediafire(url):
+        prefix = "⏳ Descargando de Mediafire…"
+    status = await message.reply_text(prefix, quote=True)
+    try:
+        folder_rel = _resolve_rel(folder)
+        item_id, reused, joined = await _fetch_url(
+            url, folder_rel, lambda wrote, total: _progress_message(status, prefix, wrote, total)
+        )
+        item = get_item(item_id) or {}
+        path = item.get("path", "")
+        if reused:
+            head = "♻️ Sin cambios, ya estaba guardado"
+        elif joined:
+            head = "🔗 Ya se estaba descargando, es el mismo archivo"
+        else:
+            head = "✅ Descargado"
+        text = (
+            f"{head}: `{path}`\n"
+            f"🆔 ID: *{item_id}*  •  {pretty_size(int(item.get('size', 0)))}"
+        )
+        if os.path.dirname(path) != folder_rel:
+            text += (
+                f"\nℹ️ No se guardó en `{folder_rel or '.'}`; "
+                f"usa `/mv {item_id} {folder_rel or '/'}` para moverlo"
+            )
+        await status.edit_text(text)
+    except Exception as e:
+        await status.edit_text(f"❌ Error: `{e}`")
+
+
+@app.on_message(filters.command(["ls-remote", "ls_remote"]) & owner_guard())
+@monitor.timed
+async def ls_remote_cmd(_, message: Message):
+    if len(message.command) < 2:
+        return await message.reply_text("❌ Uso: `/ls-remote <url>`", quote=True)
+    url = message.command[1].strip()
+    prefix = "⏳ Leyendo ZIP remoto…"
+    status = await message.reply_text(prefix, quote=True)
+    try:
+        entries, read_b = await list_remote_zip(
+            url, progress_cb=lambda wrote, total: _progress_message(status, prefix, wrote, total)
+        )
+        files = [e for e in entries if not e[3]]
+        total_b = sum(e[1] for e in files)
+        how = f"leídos {pretty_size(read_b)} con Range" if read_b is not None else "sin Range: descarga completa"
+        lines = [f"🗂️ *ZIP remoto:* {len(files)} archivo(s), {pretty_size(total_b)} ({how})\n"]
+        for name, size_b, _csize, _is_dir in files[:60]:
+            lines.append(f"📄 `{name}`  •  {pretty_size(size_b)}")
+        if len(files) > 60:
+            lines.append(f"\n…y {len(files)-60} más")
+        await status.edit_text("\n".join(lines), disable_web_page_preview=True)
+    except Exception as e:
+        await status.edit_text(f"❌ Error: `{e}`")
+
+
+@app.on_message(filters.command(["get-member", "get_member"]) & owner_guard())
+@monitor.timed
+async def get_member_cmd(_, message: Message):
+    if len(message.command) < 3:
+        return await message.reply_text("❌ Uso: `/get-member <url> <ruta_en_zip> [carpeta]`", quote=True)
+    url = message.command[1].strip()
+    member = message.command[2].strip()
+    folder = " ".join(message.command[3:]).strip()
+    prefix = f"⏳ Extrayendo `{member}`…"
+    status = await message.reply_text(prefix, quote=True)
+    try:
+        folder_rel = _resolve_rel(folder)
+        folder_abs = ensure_dir(folder_rel)
+        dest = os.path.join(folder_abs, _reserve_name(folder_abs, os.path.basename(member.rstrip("/"))))
+        try:
+            size_b, read_b = await fetch_remote_member(
+                url, member, dest, progress_cb=lambda wrote, total: _progress_message(status, prefix, wrote, total)
+            )
+        except BaseException:
+            os.remove(dest)
+            raise
+        rel = os.path.relpath(dest, STORAGE_DIR)
+        item_id = alloc_id()
+        put_item(item_id, rel, os.path.basename(rel), size_b)
+        how = f"leídos {pretty_size(read_b)} con Range" if read_b is not None else "sin Range: descarga completa"
+        await status.edit_text(
+            f"✅ Extraído: `{rel}`\n"
+            f"🆔 ID: *{item_id}*  •  {pretty_size(size_b)} ({how})"
+        )
+    except KeyError:
+        await status.edit_text(f"❌ `{member}` no está en el ZIP (mira `/ls-remote`)")
+    except Exception as e:
+        await status.edit_text(f"❌ Error: `{e}`")
+
+
+@app.on_message(filters.command(["perf"]) & owner_guard())
+@monitor.timed
+async def perf_cmd(_, message: Message):
+    lags = list(monitor.lags)
+    lines = [
+        "📈 *Rendimiento*",
+        f"• Lag del loop: p50 {percentile(lags, 50) * 1000:.0f} ms  •  p99 {percentile(lags, 99) * 1000:.0f} ms"
+        f"  •  máx {monitor.lag_max * 1000:.0f} ms",
+        f"• Bloqueos > {monitor.threshold * 1000:.0f} ms: *{monitor.stall_count}*",
+    ]
+    if monitor.stalls:
+        when, blocked, stack = monitor.stalls[-1]
+        ago = datetime.now().timestamp() - when
+        lines.append(f"\n*Último bloqueo* (hace {ago:.0f}s, >{blocked * 1000:.0f} ms):")
+        lines.append("```\n" + "\n".join(stack) + "\n```")
+    stats = monitor.handler_stats()
+    if stats:
+        lines.append("\n*Comandos* (n • p50 • p95 • máx)")
+        for name, calls, p50, p95, worst in stats[:15]:
+            lines.append(f"• `{name}` {calls} • {p50 * 1000:.0f} • {p95 * 1000:.0f} • {worst * 1000:.0f} ms")
+    await message.reply_text("\n".join(lines), disable_web_page_preview=True)
+
+
 @app.on_message(filters.command(["mkdir"]) & owner_guard())
+@monitor.timed
 async def mkdir_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/mkdir <carpeta>`", quote=True)
@@ -138,11 +406,12 @@ async def mkdir_cmd(_, message: Message):
 
 
 @app.on_message(filters.command(["ls"]) & owner_guard())
+@monitor.timed
 async def ls_cmd(_, message: Message):
     rel = " ".join(message.command[1:]).strip() if len(message.command) > 1 else ""
     rel = _resolve_rel(rel)
     try:
-        entries = list_dir(rel)
+        entries = await asyncio.to_thread(lambda: list_dir(rel, _cold_sizes(rel)))
         if not entries:
             return await message.reply_text(f"📂 `{rel or '.'}` está vacío.")
         lines = [f"📂 *Listado:* `{rel or '.'}`\n"]
@@ -157,6 +426,7 @@ async def ls_cmd(_, message: Message):
 
 
 @app.on_message(filters.command(["files"]) & owner_guard())
+@monitor.timed
 async def files_cmd(_, message: Message):
     from .db import load_db
 
@@ -178,7 +448,34 @@ async def files_cmd(_, message: Message):
     await message.reply_text("\n".join(lines), disable_web_page_preview=True)
 
 
+@app.on_message(filters.command(["find"]) & owner_guard())
+@monitor.timed
+async def find_cmd(_, message: Message):
+    if len(message.command) < 2:
+        return await message.reply_text(
+            "❌ Uso: `/find <texto> [ext:pdf] [size>10M] [size<1G] [after:AAAA-MM-DD] [before:AAAA-MM-DD] [in:carpeta]`"
+        )
+    try:
+        query, opts = _parse_find_args(message.command[1:])
+    except ValueError as e:
+        return await message.reply_text(f"❌ Filtro inválido: `{e}`")
+    t0 = asyncio.get_running_loop().time()
+    total, results = await asyncio.to_thread(search_items, query, limit=50, **opts)
+    elapsed_ms = (asyncio.get_running_loop().time() - t0) * 1000
+    if not total:
+        return await message.reply_text("🔎 Sin resultados.")
+    shown = f"{total}+" if total >= SEARCH_COUNT_CAP else str(total)
+    lines = [f"🔎 *{shown} resultado(s)* ({elapsed_ms:.0f} ms)\n"]
+    for item_id, v in results:
+        lines.append(f"• *{item_id}* → `{v['path']}`  ({pretty_size(int(v['size']))})")
+    if total > len(results):
+        more = f"{total - len(results)}+" if total >= SEARCH_COUNT_CAP else str(total - len(results))
+        lines.append(f"\n…y {more} más (afina la búsqueda)")
+    await message.reply_text("\n".join(lines), disable_web_page_preview=True)
+
+
 @app.on_message(filters.command(["info"]) & owner_guard())
+@monitor.timed
 async def info_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/info <id>`")
@@ -190,20 +487,26 @@ async def info_cmd(_, message: Message):
     if not item:
         return await message.reply_text("❌ No existe ese ID")
     path = item.get("path", "")
-    abs_path = os.path.join(STORAGE_DIR, path)
+    abs_path = os.path.join(STORAGE_DIR, stored_rel(item))
     exists = os.path.exists(abs_path)
+    size_b = int(item.get("size", 0))
+    stored = f"{pretty_size(stored_size(item))}"
+    if is_compressed(item) and size_b:
+        stored += f" (zstd, {stored_size(item) / size_b * 100:.0f}%)"
     await message.reply_text(
         "🧾 *Info*\n"
         f"• ID: *{item_id}*\n"
         f"• Nombre: `{item.get('name','')}`\n"
         f"• Ruta: `{path}`\n"
-        f"• Tamaño: {pretty_size(int(item.get('size',0)))}\n"
+        f"• Tamaño: {pretty_size(size_b)}\n"
+        f"• En disco: {stored}\n"
         f"• Existe: {'✅' if exists else '❌'}",
         disable_web_page_preview=True,
     )
 
 
 @app.on_message(filters.command(["rm"]) & owner_guard())
+@monitor.timed
 async def rm_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/rm <id>`")
@@ -215,14 +518,16 @@ async def rm_cmd(_, message: Message):
     if not item:
         return await message.reply_text("❌ No existe ese ID")
     try:
-        delete_rel(item["path"])
+        delete_rel(stored_rel(item))
     except Exception:
         pass
+    drop_hot(item_id)
     del_item(item_id)
     await message.reply_text(f"🗑️ Borrado ID *{item_id}*.")
 
 
 @app.on_message(filters.command(["rename"]) & owner_guard())
+@monitor.timed
 async def rename_cmd(_, message: Message):
     if len(message.command) < 3:
         return await message.reply_text("❌ Uso: `/rename <id> <nuevo_nombre>`")
@@ -235,16 +540,18 @@ async def rename_cmd(_, message: Message):
     if not item:
         return await message.reply_text("❌ No existe ese ID")
     try:
-        new_rel = rename_rel(item["path"], new_name)
-        # update DB size/name/path
-        abs_path = os.path.join(STORAGE_DIR, new_rel)
-        put_item(item_id, new_rel, os.path.basename(new_rel), os.path.getsize(abs_path))
+        new_rel = os.path.join(os.path.dirname(item["path"]), safe_name(new_name, default="file"))
+        # updates DB size/name/path; cold items are renamed without decompressing
+        await asyncio.to_thread(move_item, item_id, new_rel)
         await message.reply_text(f"✏️ Renombrado: *{item_id}* → `{os.path.basename(new_rel)}`")
+    except FileExistsError:
+        await message.reply_text(f"❌ Ya existe `{os.path.basename(new_rel)}` en esa carpeta")
     except Exception as e:
         await message.reply_text(f"❌ Error: `{e}`")
 
 
 @app.on_message(filters.command(["mv"]) & owner_guard())
+@monitor.timed
 async def mv_cmd(_, message: Message):
     if len(message.command) < 3:
         return await message.reply_text("❌ Uso: `/mv <id> <carpeta>`")
@@ -263,24 +570,23 @@ async def mv_cmd(_, message: Message):
         os.makedirs(dst_abs_folder, exist_ok=True)
         dst_name = os.path.basename(src_rel)
         dst_rel = os.path.join(folder_rel, dst_name) if folder_rel else dst_name
-        # unique if already exists
+        # unique if already exists (as a plain file or as a cold .zst)
         dst_abs = os.path.join(STORAGE_DIR, dst_rel)
-        if os.path.exists(dst_abs):
+        if path_taken(dst_abs):
             stem, ext = os.path.splitext(dst_name)
             i = 1
-            while os.path.exists(os.path.join(dst_abs_folder, f"{stem}_{i}{ext}")):
+            while path_taken(os.path.join(dst_abs_folder, f"{stem}_{i}{ext}")):
                 i += 1
             dst_name = f"{stem}_{i}{ext}"
             dst_rel = os.path.join(folder_rel, dst_name) if folder_rel else dst_name
-        os.makedirs(os.path.dirname(os.path.join(STORAGE_DIR, dst_rel)), exist_ok=True)
-        os.replace(os.path.join(STORAGE_DIR, src_rel), os.path.join(STORAGE_DIR, dst_rel))
-        put_item(item_id, dst_rel, dst_name, os.path.getsize(os.path.join(STORAGE_DIR, dst_rel)))
+        await asyncio.to_thread(move_item, item_id, dst_rel)
         await message.reply_text(f"📦 Movido ID *{item_id}* → `{folder_rel or '.'}`")
     except Exception as e:
         await message.reply_text(f"❌ Error: `{e}`")
 
 
 @app.on_message(filters.command(["zip"]) & owner_guard())
+@monitor.timed
 async def zip_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/zip <carpeta> [nombre.zip]`")
@@ -288,7 +594,8 @@ async def zip_cmd(_, message: Message):
     zipname = message.command[2].strip() if len(message.command) >= 3 else f"{safe_name(folder, 'folder')}.zip"
     try:
         folder_rel = _resolve_rel(folder)
-        zip_rel = zip_folder(folder_rel, zipname)
+        cold = _cold_sizes(folder_rel)
+        zip_rel = zip_folder(folder_rel, zipname, compressed=cold)
         abs_zip = os.path.join(STORAGE_DIR, zip_rel)
         zid = alloc_id()
         put_item(zid, zip_rel, os.path.basename(zip_rel), os.path.getsize(abs_zip))
@@ -301,6 +608,7 @@ async def zip_cmd(_, message: Message):
 
 
 @app.on_message(filters.command(["zipid"]) & owner_guard())
+@monitor.timed
 async def zipid_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/zipid <id> [nombre.zip]`")
@@ -312,8 +620,9 @@ async def zipid_cmd(_, message: Message):
     if not item:
         return await message.reply_text("❌ No existe ese ID")
     zipname = message.command[2].strip() if len(message.command) >= 3 else f"{safe_name(item.get('name','file'), 'file')}.zip"
+    await asyncio.to_thread(touch_item, item_id)
     try:
-        zip_rel = zip_file(item["path"], zipname)
+        zip_rel = zip_file(item["path"], zipname, compressed=is_compressed(item))
         abs_zip = os.path.join(STORAGE_DIR, zip_rel)
         zid = alloc_id()
         put_item(zid, zip_rel, os.path.basename(zip_rel), os.path.getsize(abs_zip))
@@ -327,6 +636,7 @@ async def zipid_cmd(_, message: Message):
 @app.on_message(filters.command(["up"]) & owner_guard())
 
 @app.on_message(filters.command(["up"]) & owner_guard())
+@monitor.timed
 async def up_cmd(_, message: Message):
     if len(message.command) < 2:
         return await message.reply_text("❌ Uso: `/up <id>`")
@@ -341,13 +651,38 @@ async def up_cmd(_, message: Message):
         return await message.reply_text("❌ No existe ese ID")
 
     rel_path = item.get("path", "")
-    abs_path = os.path.join(STORAGE_DIR, rel_path)
+    abs_path = os.path.join(STORAGE_DIR, stored_rel(item))
 
     if not os.path.exists(abs_path):
         return await message.reply_text("❌ El archivo no existe en el storage")
 
-    await message.reply_document(
-        document=abs_path,
-        caption=f"⬆️ Subido ID *{item_id}*: `{os.path.basename(abs_path)}`",
-        quote=True
-    )
+    await asyncio.to_thread(touch_item, item_id)
+    try:
+        # cold items are decompressed into the hot cache
+        document = await asyncio.to_thread(local_path, item_id, item)
+    except Exception as e:
+        return await message.reply_text(f"❌ Error: `{e}`")
+    try:
+        await message.reply_document(
+            document=document,
+            caption=f"⬆️ Subido ID *{item_id}*: `{os.path.basename(rel_path)}`",
+            quote=True
+        )
+    except Exception as e:
+        await message.reply_text(f"❌ Error: `{e}`")
+    finally:
+        release_local(item_id)
+
+
+async def main():
+    monitor.start()
+    await asyncio.to_thread(open_index)
+    start_tiering()
+    await app.start()
+    await idle()
+    await app.stop()
+    stop_tiering()
+
+
+if __name__ == "__main__":
+    app.run(main())
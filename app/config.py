@@ -7,6 +7,11 @@ BOT_TOKEN = os.getenv("BOT_TOKEN", "")
 PORT = int(os.getenv("PORT", "10000"))
 STORAGE_DIR = os.getenv("STORAGE_DIR", "/app/storage")
 DB_PATH = os.getenv("DB_PATH", os.path.join(STORAGE_DIR, "db.json"))
+# Bot-internal files default to the folder that contains STORAGE_DIR, not
+# STORAGE_DIR itself, so /ls, folder sizes and /zip never see them
+STORAGE_PARENT = os.path.dirname(os.path.normpath(STORAGE_DIR))
+# Search index for /find (derived from the DB, rebuilt if missing)
+INDEX_PATH = os.getenv("INDEX_PATH", os.path.join(STORAGE_PARENT, ".sasuke-index.sqlite3"))
 
 # Safety limits (best-effort; Render disk is limited)
 MAX_DOWNLOAD_MB = int(os.getenv("MAX_DOWNLOAD_MB", "4096"))  # 4GB default
@@ -14,3 +19,20 @@ MAX_DOWNLOAD_MB = int(os.getenv("MAX_DOWNLOAD_MB", "4096"))  # 4GB default
 OWNER_ONLY = os.getenv("OWNER_ONLY", "0") == "1"
 OWNER_ID = int(os.getenv("OWNER_ID", "0"))  # if OWNER_ONLY=1
 
+# Event-loop lag monitor (/perf)
+PERF_INTERVAL_MS = int(os.getenv("PERF_INTERVAL_MS", "100"))
+PERF_LAG_MS = int(os.getenv("PERF_LAG_MS", "250"))  # report blocking calls longer than this
+PERF_LOG_PATH = os.getenv("PERF_LOG_PATH", os.path.join(STORAGE_PARENT, ".sasuke-perf.log"))
+PERF_LOG_MB = int(os.getenv("PERF_LOG_MB", "5"))
+PERF_SUMMARY_S = int(os.getenv("PERF_SUMMARY_S", "300"))
+
+# Cold tier: zstd-compress items idle for TIER_IDLE_DAYS (needs `zstandard`)
+TIER_ENABLED = os.getenv("TIER_ENABLED", "1") == "1"
+TIER_IDLE_DAYS = float(os.getenv("TIER_IDLE_DAYS", "14"))
+TIER_INTERVAL_MIN = int(os.getenv("TIER_INTERVAL_MIN", "60"))
+TIER_LEVEL = int(os.getenv("TIER_LEVEL", "6"))
+TIER_MIN_SAVING = float(os.getenv("TIER_MIN_SAVING", "0.1"))  # skip files that shrink less than 10%
+TIER_MIN_KB = int(os.getenv("TIER_MIN_KB", "256"))
+# Decompressed copies of recently read cold items
+HOT_DIR = os.getenv("HOT_DIR", os.path.join(STORAGE_PARENT, ".sasuke-hot"))
+HOT_CACHE_MB = int(os.getenv("HOT_CACHE_MB", "512"))
@@ -1,16 +1,27 @@
+import copy
 import json
 import os
+import sqlite3
 import threading
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional, Tuple
 
-from .config import DB_PATH, STORAGE_DIR
+from .config import DB_PATH, INDEX_PATH, STORAGE_DIR
 
 _lock = threading.Lock()
+# held across a whole load -> modify -> save, so writers on worker threads
+# (tiering) and on the event loop can't drop each other's changes
+_write_lock = threading.Lock()
+_index_lock = threading.Lock()
+_index_conn: Optional[sqlite3.Connection] = None
 
 DEFAULT_DB: Dict[str, Any] = {
     "next_id": 0,
-    # id(str) -> {"path": str, "name": str, "size": int}
+    # id(str) -> {"path": str, "name": str, "size": int, "added": float, "atime": float,
+    #             optional "codec": "zstd", "stored_size": int (see tiering.py)}
     "items": {},
+    # normalized url -> {"id": int, "etag": str|None, "last_modified": str|None}
+    "urls": {},
 }
 
 
@@ -22,15 +33,16 @@ def load_db() -> Dict[str, Any]:
     _ensure_base()
     if not os.path.exists(DB_PATH):
         save_db(DEFAULT_DB)
-        return dict(DEFAULT_DB)
+        return copy.deepcopy(DEFAULT_DB)
     with _lock:
         with open(DB_PATH, "r", encoding="utf-8") as f:
             try:
                 data = json.load(f)
             except json.JSONDecodeError:
-                data = dict(DEFAULT_DB)
+                data = copy.deepcopy(DEFAULT_DB)
     data.setdefault("next_id", 0)
     data.setdefault("items", {})
+    data.setdefault("urls", {})
     return data
 
 
@@ -44,17 +56,44 @@ def save_db(data: Dict[str, Any]) -> None:
 
 
 def alloc_id() -> int:
-    db = load_db()
-    new_id = int(db.get("next_id", 0))
-    db["next_id"] = new_id + 1
-    save_db(db)
+    with _write_lock:
+        db = load_db()
+        new_id = int(db.get("next_id", 0))
+        db["next_id"] = new_id + 1
+        save_db(db)
     return new_id
 
 
 def put_item(item_id: int, path: str, name: str, size: int) -> None:
-    db = load_db()
-    db["items"][str(item_id)] = {"path": path, "name": name, "size": int(size)}
-    save_db(db)
+    with _write_lock:
+        db = load_db()
+        item = db["items"].setdefault(str(item_id), {})
+        item.update({"path": path, "name": name, "size": int(size)})
+        item.setdefault("added", time.time())
+        item.setdefault("atime", item["added"])
+        save_db(db)
+        _index_put(item_id, item)
+
+
+def update_item(item_id: int, **fields: Any) -> bool:
+    """Set extra fields on an item record; a value of None removes the field."""
+    with _write_lock:
+        db = load_db()
+        item = db.get("items", {}).get(str(item_id))
+        if item is None:
+            return False
+        for k, v in fields.items():
+            if v is None:
+                item.pop(k, None)
+            else:
+                item[k] = v
+        save_db(db)
+    return True
+
+
+def touch_item(item_id: int) -> None:
+    """Record that an item was just read (keeps it out of the cold tier)."""
+    update_item(item_id, atime=time.time())
 
 
 def get_item(item_id: int) -> Optional[Dict[str, Any]]:
@@ -63,13 +102,31 @@ def get_item(item_id: int) -> Optional[Dict[str, Any]]:
 
 
 def del_item(item_id: int) -> bool:
-    db = load_db()
-    items = db.get("items", {})
-    if str(item_id) in items:
+    with _write_lock:
+        db = load_db()
+        items = db.get("items", {})
+        if str(item_id) not in items:
+            return False
         del items[str(item_id)]
+        urls = db.get("urls", {})
+        for url in [u for u, v in urls.items() if v.get("id") == int(item_id)]:
+            del urls[url]
+        save_db(db)
+        _index_del(item_id)
+    return True
+
+
+def get_url(url: str) -> Optional[Dict[str, Any]]:
+    db = load_db()
+    return db.get("urls", {}).get(url)
+
+
+def put_url(url: str, item_id: int, etag: Optional[str], last_modified: Optional[str]) -> None:
+    """Remember which item a (normalized) URL was downloaded into, with its validators."""
+    with _write_lock:
+        db = load_db()
+        db["urls"][url] = {"id": int(item_id), "etag": etag, "last_modified": last_modified}
         save_db(db)
-        return True
-    return False
 
 
 def list_items(prefix_path: str = "") -> Dict[str, Any]:
@@ -84,3 +141,223 @@ def list_items(prefix_path: str = "") -> Dict[str, Any]:
         if p.startswith(prefix_path):
             out[k] = v
     return out
+
+
+# ---------------------------------------------------------------------------
+# Search index (/find)
+#
+# Names and paths are split into lowercase trigrams stored in SQLite next to
+# the JSON DB. put_item/del_item keep it in sync row by row, so a lookup never
+# has to load or scan the whole DB.
+# ---------------------------------------------------------------------------
+
+_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    lname TEXT NOT NULL,
+    lpath TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    added REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_ext ON entries(ext);
+CREATE INDEX IF NOT EXISTS entries_size ON entries(size);
+CREATE INDEX IF NOT EXISTS entries_added ON entries(added);
+CREATE TABLE IF NOT EXISTS grams (
+    gram TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    PRIMARY KEY (gram, id)
+) WITHOUT ROWID;
+"""
+
+
+def _trigrams(text: str) -> set:
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _entry_row(item_id: int, item: Dict[str, Any]) -> Tuple:
+    path = item.get("path", "")
+    name = item.get("name") or os.path.basename(path)
+    ext = os.path.splitext(name)[1].lstrip(".").lower()
+    return (
+        int(item_id), name, path, name.lower(), path.lower(), ext,
+        int(item.get("size", 0)), float(item.get("added", 0.0)),
+    )
+
+
+def _index_drop(conn: sqlite3.Connection, item_id: int) -> None:
+    row = conn.execute("SELECT lname, lpath FROM entries WHERE id = ?", (int(item_id),)).fetchone()
+    if not row:
+        return
+    grams = _trigrams(row[0]) | _trigrams(row[1])
+    conn.executemany("DELETE FROM grams WHERE gram = ? AND id = ?", [(g, int(item_id)) for g in grams])
+    conn.execute("DELETE FROM entries WHERE id = ?", (int(item_id),))
+
+
+def _index_write(conn: sqlite3.Connection, item_id: int, item: Dict[str, Any]) -> None:
+    conn.execute("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", _entry_row(item_id, item))
+    grams = _trigrams(item.get("name", "")) | _trigrams(item.get("path", ""))
+    conn.executemany("INSERT OR IGNORE INTO grams VALUES (?, ?)", [(g, int(item_id)) for g in grams])
+
+
+def _rebuild_index(conn: sqlite3.Connection) -> None:
+    items = load_db().get("items", {})
+    with conn:
+        conn.execute("DELETE FROM grams")
+        conn.execute("DELETE FROM entries")
+        for k, v in items.items():
+            if "added" not in v:
+                # legacy records: fall back to the file's mtime
+                try:
+                    v = dict(v, added=os.path.getmtime(os.path.join(STORAGE_DIR, v.get("path", ""))))
+                except OSError:
+                    pass
+            _index_write(conn, int(k), v)
+
+
+def _index_stale(conn: sqlite3.Connection) -> bool:
+    # compare contents, not just row counts: a crash between save_db and
+    # _index_put on a rename leaves the count right and the path wrong
+    want = set()
+    for k, v in load_db().get("items", {}).items():
+        path = v.get("path", "")
+        want.add((int(k), path, v.get("name") or os.path.basename(path), int(v.get("size", 0))))
+    have = set(conn.execute("SELECT id, path, name, size FROM entries"))
+    return want != have
+
+
+def _index() -> sqlite3.Connection:
+    """Open the index once per process, rebuilding it if it drifted from the DB."""
+    global _index_conn
+    if _index_conn is None:
+        _ensure_base()
+        os.makedirs(os.path.dirname(INDEX_PATH) or ".", exist_ok=True)
+        conn = sqlite3.connect(INDEX_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_INDEX_SCHEMA)
+        if _index_stale(conn):
+            _rebuild_index(conn)
+        _index_conn = conn
+    return _index_conn
+
+
+def open_index() -> None:
+    """Open the search index, rebuilding it if needed.
+
+    Called once at startup from a worker thread: rebuilding a big DB takes
+    seconds and must not happen lazily inside a handler.
+    """
+    with _index_lock:
+        _index()
+
+
+def _index_put(item_id: int, item: Dict[str, Any]) -> None:
+    with _index_lock:
+        conn = _index()
+        with conn:
+            _index_drop(conn, item_id)
+            _index_write(conn, item_id, item)
+
+
+def _index_del(item_id: int) -> None:
+    with _index_lock:
+        conn = _index()
+        with conn:
+            _index_drop(conn, item_id)
+
+
+# Candidate-gram counts stop here; past this any gram is "common enough"
+GRAM_COUNT_CAP = 20000
+# /find reports at most this many matches (then "N+")
+SEARCH_COUNT_CAP = 1000
+
+
+def _rarest_gram(conn: sqlite3.Connection, grams: List[str]) -> Tuple[Optional[str], int]:
+    best, best_n = None, -1
+    for g in grams:
+        (n,) = conn.execute(
+            "SELECT COUNT(*) FROM (SELECT 1 FROM grams WHERE gram = ? LIMIT ?)", (g, GRAM_COUNT_CAP)
+        ).fetchone()
+        if best is None or n < best_n:
+            best, best_n = g, n
+        if n == 0:
+            break
+    return best, best_n
+
+
+def search_items(
+    query: str = "",
+    ext: Optional[str] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    after: Optional[float] = None,
+    before: Optional[float] = None,
+    folder: Optional[str] = None,
+    limit: int = 50,
+) -> Tuple[int, List[Tuple[int, Dict[str, Any]]]]:
+    """Substring search over item names/paths plus filters.
+
+    The query is split on whitespace and every term must appear (stored
+    names never contain spaces, so "annual report" finds Annual_Report.pdf).
+    Returns (total_matches, [(id, {"path", "name", "size", "added"}), ...])
+    with at most `limit` rows, newest first. total_matches is capped at
+    SEARCH_COUNT_CAP.
+    """
+    where: List[str] = []
+    args: List[Any] = []
+
+    terms = (query or "").lower().split()
+    for term in terms:
+        # the real check; the trigram join below only narrows the candidates
+        where.append("(instr(e.lname, ?) > 0 OR instr(e.lpath, ?) > 0)")
+        args.extend([term, term])
+    if ext:
+        where.append("e.ext = ?")
+        args.append(ext.lstrip(".").lower())
+    if min_size is not None:
+        where.append("e.size >= ?")
+        args.append(int(min_size))
+    if max_size is not None:
+        where.append("e.size <= ?")
+        args.append(int(max_size))
+    if after is not None:
+        where.append("e.added >= ?")
+        args.append(float(after))
+    if before is not None:
+        where.append("e.added < ?")
+        args.append(float(before))
+    prefix = os.path.normpath((folder or "").strip("/")).lower()
+    if prefix not in ("", "."):
+        prefix += "/"
+        where.append("substr(e.lpath, 1, ?) = ?")
+        args.extend([len(prefix), prefix])
+
+    with _index_lock:
+        conn = _index()
+        source = "entries e"
+        grams = sorted(set().union(*(_trigrams(t) for t in terms)))
+        if grams:
+            # every match contains every trigram of every term: walking the
+            # postings of the rarest one is enough to find them all
+            gram, n = _rarest_gram(conn, grams)
+            if n == 0:
+                return 0, []
+            source = "grams g JOIN entries e ON e.id = g.id"
+            where.insert(0, "g.gram = ?")
+            args.insert(0, gram)
+        clause = (" WHERE " + " AND ".join(where)) if where else ""
+        rows = conn.execute(
+            "SELECT e.id, e.path, e.name, e.size, e.added FROM "
+            + source
+            + clause
+            + " ORDER BY e.added DESC, e.id DESC LIMIT ?",
+            args + [max(int(limit), SEARCH_COUNT_CAP)],
+        ).fetchall()
+    return len(rows), [
+        (row[0], {"path": row[1], "name": row[2], "size": row[3], "added": row[4]})
+        for row in rows[:limit]
+    ]
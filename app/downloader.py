@@ -2,7 +2,7 @@ import asyncio
 import os
 import re
 import urllib.parse
-from typing import Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 import aiohttp
 import requests
@@ -13,8 +13,20 @@ from .utils import safe_name
 
 GDRIVE_FILE_RE = re.compile(r"/file/d/([a-zA-Z0-9_-]+)")
 
+# normalized URL -> future of the transfer currently running for it
+_inflight: Dict[str, "asyncio.Future[Any]"] = {}
 
-def _guess_filename_from_url(url: str) -> str:
+
+class NotModified(Exception):
+    """The server answered 304 to a conditional request."""
+
+
+def guess_filename(url: str) -> str:
+    """Best name from the URL alone (the server's Content-Disposition wins later)."""
+    if is_google_drive(url):
+        file_id = _gdrive_id(url)
+        if file_id:
+            return f"gdrive_{file_id}"
     path = urllib.parse.urlparse(url).path
     name = os.path.basename(path) or "download"
     return safe_name(urllib.parse.unquote(name))
@@ -30,16 +42,21 @@ def is_mediafire(url: str) -> bool:
     return "mediafire.com" in host
 
 
-def normalize_google_drive(url: str) -> Optional[str]:
-    """Return a direct download URL if possible."""
+def _gdrive_id(url: str) -> Optional[str]:
     m = GDRIVE_FILE_RE.search(url)
     if m:
-        file_id = m.group(1)
-        return f"https://drive.google.com/uc?export=download&id={file_id}"
+        return m.group(1)
     # Some links: https://drive.google.com/open?id=...
     q = urllib.parse.parse_qs(urllib.parse.urlparse(url).query)
     if "id" in q and q["id"]:
-        file_id = q["id"][0]
+        return q["id"][0]
+    return None
+
+
+def normalize_google_drive(url: str) -> Optional[str]:
+    """Return a direct download URL if possible."""
+    file_id = _gdrive_id(url)
+    if file_id:
         return f"https://drive.google.com/uc?export=download&id={file_id}"
     return None
 
@@ -63,6 +80,51 @@ def resolve_mediafire_direct(url: str) -> Optional[str]:
     return None
 
 
+async def resolve_url(url: str) -> str:
+    """Turn Mediafire/Drive share links into the URL that serves the bytes."""
+    if is_mediafire(url):
+        # requests + HTML parsing: keep it off the event loop
+        direct = await asyncio.to_thread(resolve_mediafire_direct, url)
+        if direct:
+            url = direct
+    if is_google_drive(url):
+        direct = normalize_google_drive(url)
+        if direct:
+            url = direct
+    return url
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form used as the dedup key (case, default ports, query order, fragment)."""
+    parts = urllib.parse.urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    query = urllib.parse.urlencode(sorted(urllib.parse.parse_qsl(parts.query, keep_blank_values=True)))
+    return urllib.parse.urlunsplit((scheme, host, parts.path or "/", query, ""))
+
+
+def in_flight(key: str) -> bool:
+    """True while a single_flight() call for `key` is running."""
+    return key in _inflight
+
+
+async def single_flight(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """Run factory() once per key; concurrent callers with the same key await the same result.
+
+    The shared task is shielded, so a caller that gets cancelled does not
+    abort the transfer for everyone else.
+    """
+    fut = _inflight.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(factory())
+        _inflight[key] = fut
+        fut.add_done_callback(lambda _: _inflight.pop(key, None))
+    return await asyncio.shield(fut)
+
+
 async def head_content_length(session: aiohttp.ClientSession, url: str) -> Optional[int]:
     try:
         async with session.head(url, allow_redirects=True, timeout=30) as resp:
@@ -77,19 +139,30 @@ async def download_file(
     dest_path: str,
     progress_cb=None,
     chunk_size: int = 1024 * 256,
-) -> Tuple[str, int]:
-    """Download URL -> dest_path. Returns (final_path, size_bytes)."""
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+    resolve: bool = True,
+) -> Tuple[str, int, Optional[str], Optional[str], Optional[str]]:
+    """Download URL -> dest_path.
+
+    Returns (final_path, size_bytes, etag, last_modified, filename), where
+    filename comes from Content-Disposition (None if the server sent none).
+
+    If etag/last_modified are given the request is conditional and
+    NotModified is raised when the server answers 304. Pass resolve=False
+    when `url` already went through resolve_url().
+    """
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
 
     original_url = url
-    if is_mediafire(url):
-        direct = resolve_mediafire_direct(url)
-        if direct:
-            url = direct
-    if is_google_drive(url):
-        direct = normalize_google_drive(url)
-        if direct:
-            url = direct
+    if resolve:
+        url = await resolve_url(url)
+
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
 
     timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=300)
     async with aiohttp.ClientSession(timeout=timeout) as session:
@@ -104,7 +177,9 @@ async def download_file(
                 return data, {"cookies": session.cookie_jar.filter_cookies(u)}
 
         # Try streaming normally (no full read)
-        async with session.get(url, allow_redirects=True) as resp:
+        async with session.get(url, allow_redirects=True, headers=headers) as resp:
+            if resp.status == 304:
+                raise NotModified(url)
             resp.raise_for_status()
             # Drive confirm page
             ctype = (resp.headers.get("Content-Type") or "").lower()
@@ -116,8 +191,10 @@ async def download_file(
                     confirm_token = confirm.group(1)
                     file_id = file_id_match.group(1)
                     url2 = f"https://drive.google.com/uc?export=download&confirm={confirm_token}&id={file_id}"
-                    # restart request
-                    return await download_file(url2, dest_path, progress_cb=progress_cb, chunk_size=chunk_size)
+                    # restart request (already resolved: don't let it strip the token)
+                    return await download_file(
+                        url2, dest_path, progress_cb=progress_cb, chunk_size=chunk_size, resolve=False
+                    )
 
             total = resp.headers.get("Content-Length")
             total = int(total) if total else None
@@ -126,15 +203,22 @@ async def download_file(
 
             wrote = 0
             tmp_path = dest_path + ".part"
-            with open(tmp_path, "wb") as f:
-                async for chunk in resp.content.iter_chunked(chunk_size):
-                    if not chunk:
-                        continue
-                    f.write(chunk)
-                    wrote += len(chunk)
-                    if wrote > size_limit_bytes:
-                        raise ValueError(f"File too large (limit {size_limit_bytes})")
-                    if progress_cb:
-                        await progress_cb(wrote, total)
+            try:
+                with open(tmp_path, "wb") as f:
+                    async for chunk in resp.content.iter_chunked(chunk_size):
+                        if not chunk:
+                            continue
+                        f.write(chunk)
+                        wrote += len(chunk)
+                        if wrote > size_limit_bytes:
+                            raise ValueError(f"File too large (limit {size_limit_bytes})")
+                        if progress_cb:
+                            await progress_cb(wrote, total)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
             os.replace(tmp_path, dest_path)
-            return dest_path, wrote
+            disposition = resp.content_disposition
+            filename = disposition.filename if disposition else None
+            return dest_path, wrote, resp.headers.get("ETag"), resp.headers.get("Last-Modified"), filename
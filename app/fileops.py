@@ -1,30 +1,46 @@
 import os
 import shutil
 import zipfile
-from typing import List, Tuple
+from typing import Collection, List, Mapping, Optional, Tuple
 
+from .tiering import ZST_SUFFIX, open_stored
 from .utils import safe_name, ensure_dir, resolve_path
 
 
-def list_dir(rel_path: str = "") -> List[Tuple[str, str, int, bool]]:
-    """Return list of (name, relpath, size_bytes, is_dir)."""
+def list_dir(rel_path: str = "", cold: Optional[Mapping[str, int]] = None) -> List[Tuple[str, str, int, bool]]:
+    """Return list of (name, relpath, size_bytes, is_dir).
+
+    `cold` maps abs paths of cold-tier .zst files to their original size;
+    those are listed under their original name and size.
+    """
+    cold = {os.path.normpath(p): size for p, size in (cold or {}).items()}
     abs_p = ensure_dir(rel_path)
     out: List[Tuple[str, str, int, bool]] = []
     for name in sorted(os.listdir(abs_p)):
         ap = os.path.join(abs_p, name)
         rp = os.path.relpath(ap, ensure_dir(""))
         if os.path.isdir(ap):
-            out.append((name, rp, dir_size(ap), True))
+            out.append((name, rp, dir_size(ap, cold), True))
+        elif ap in cold:
+            out.append((name[: -len(ZST_SUFFIX)], rp[: -len(ZST_SUFFIX)], cold[ap], False))
         else:
-            out.append((name, rp, os.path.getsize(ap), False))
+            try:
+                out.append((name, rp, os.path.getsize(ap), False))
+            except OSError:
+                # moved/removed by a concurrent /mv, /rm or finished download
+                continue
     return out
 
 
-def dir_size(path: str) -> int:
+def dir_size(path: str, cold: Optional[Mapping[str, int]] = None) -> int:
+    cold = cold or {}
     total = 0
     for root, _, files in os.walk(path):
         for fn in files:
             fp = os.path.join(root, fn)
+            if fp in cold:
+                total += cold[fp]
+                continue
             try:
                 total += os.path.getsize(fp)
             except OSError:
@@ -59,7 +75,14 @@ def delete_rel(rel_path: str) -> None:
         os.remove(abs_p)
 
 
-def zip_folder(folder_rel: str, zip_rel: str) -> str:
+def _write_decompressed(zf: zipfile.ZipFile, zst_abs: str, arcname: str) -> None:
+    """Add a cold-tier .zst file to the archive under its original name, streaming."""
+    with open_stored(zst_abs) as src, zf.open(arcname, "w", force_zip64=True) as dst:
+        shutil.copyfileobj(src, dst, 1024 * 256)
+
+
+def zip_folder(folder_rel: str, zip_rel: str, compressed: Collection[str] = ()) -> str:
+    """ZIP a folder. `compressed` holds abs paths of cold-tier .zst files to store decompressed."""
     folder_abs = resolve_path(folder_rel)
     if not os.path.isdir(folder_abs):
         raise ValueError("Not a folder")
@@ -69,19 +92,26 @@ def zip_folder(folder_rel: str, zip_rel: str) -> str:
         zip_rel += ".zip"
     zip_abs = resolve_path(zip_rel)
     os.makedirs(os.path.dirname(zip_abs), exist_ok=True)
+    # fp below is built from a normalized folder_abs; compare like with like
+    compressed = {os.path.normpath(p) for p in compressed}
 
     with zipfile.ZipFile(zip_abs, "w", compression=zipfile.ZIP_DEFLATED) as zf:
         for root, _, files in os.walk(folder_abs):
             for fn in files:
                 fp = os.path.join(root, fn)
                 arc = os.path.relpath(fp, folder_abs)
-                zf.write(fp, arcname=arc)
+                if fp in compressed:
+                    _write_decompressed(zf, fp, arc[: -len(ZST_SUFFIX)])
+                else:
+                    zf.write(fp, arcname=arc)
     return zip_rel
 
 
-def zip_file(file_rel: str, zip_rel: str) -> str:
+def zip_file(file_rel: str, zip_rel: str, compressed: bool = False) -> str:
+    """ZIP one file. With compressed=True it is read from its cold-tier .zst copy."""
     file_abs = resolve_path(file_rel)
-    if not os.path.isfile(file_abs):
+    src_abs = file_abs + ZST_SUFFIX if compressed else file_abs
+    if not os.path.isfile(src_abs):
         raise ValueError("Not a file")
 
     zip_rel = zip_rel.strip().strip("/")
@@ -91,14 +121,9 @@ def zip_file(file_rel: str, zip_rel: str) -> str:
     os.makedirs(os.path.dirname(zip_abs), exist_ok=True)
 
     with zipfile.ZipFile(zip_abs, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-        zf.write(file_abs, arcname=os.path.basename(file_abs))
+        if compressed:
+            _write_decompressed(zf, src_abs, os.path.basename(file_abs))
+        else:
+            zf.write(file_abs, arcname=os.path.basename(file_abs))
     return zip_rel
 
-
-def rename_rel(src_rel: str, new_name: str) -> str:
-    src_abs = resolve_path(src_rel)
-    new_name = safe_name(new_name, default="file")
-    dst_abs = os.path.join(os.path.dirname(src_abs), new_name)
-    dst_rel = os.path.relpath(dst_abs, ensure_dir(""))
-    os.rename(src_abs, dst_abs)
-    return dst_rel
@@ -0,0 +1,297 @@
+"""Load-test harness: replays command traffic against the real handlers.
+
+Runs the handlers from app/bot.py in-process with a stand-in for the
+Pyrogram Client/Message API (no Telegram connection), against a throwaway
+STORAGE_DIR and a local HTTP server for /get. Reports per-command p50/p95/p99
+latency, throughput, event-loop lag and peak RSS.
+
+    python -m app.loadtest --requests 500 --concurrency 16 \\
+        --mix get=2,ls=3,files=3,mv=1,zip=1,up=2
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import os
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+DEFAULT_MIX = "get=2,ls=3,files=3,mv=1,zip=1,up=2"
+
+# same tokenizer Pyrogram uses to build Message.command
+COMMAND_ARG_RE = re.compile(r"([\"'])(.*?)(?<!\\)\1|(\S+)")
+# "🆔 ID: *12*" in the replies of /get and /zip
+ITEM_ID_RE = re.compile(r"🆔 ID: \*(\d+)\*")
+
+
+class FakeClient:
+    """Stands in for pyrogram.Client; every API call costs `latency` seconds."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.api_calls = 0
+        self._next_msg_id = 1
+
+    async def api_call(self) -> int:
+        self.api_calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self._next_msg_id += 1
+        return self._next_msg_id
+
+
+class FakeMessage:
+    """The subset of pyrogram.types.Message the handlers use."""
+
+    def __init__(self, client: FakeClient, text: str, message_id: int = 0):
+        self._client = client
+        self.id = message_id
+        self.text = text
+        self.chat = SimpleNamespace(id=1)
+        self.from_user = SimpleNamespace(id=1)
+        self.replies: List["FakeMessage"] = []
+        self.command: List[str] = []
+        if text.startswith("/"):
+            cmd, _, rest = text[1:].partition(" ")
+            self.command = [cmd.lower()] + [
+                re.sub(r"\\([\"'])", r"\1", m.group(2) or m.group(3) or "")
+                for m in COMMAND_ARG_RE.finditer(rest)
+            ]
+
+    async def reply_text(self, text: str, **_) -> "FakeMessage":
+        reply = FakeMessage(self._client, text, await self._client.api_call())
+        self.replies.append(reply)
+        return reply
+
+    async def edit_text(self, text: str, **_) -> "FakeMessage":
+        await self._client.api_call()
+        self.text = text
+        return self
+
+    async def reply_document(self, document, caption: str = "", **_) -> "FakeMessage":
+        # Pyrogram reads the file on the loop while uploading; do the same
+        with open(document, "rb") as f:
+            while f.read(512 * 1024):
+                pass
+        return await self.reply_text(caption)
+
+    def last_text(self) -> str:
+        msg = self
+        while msg.replies:
+            msg = msg.replies[-1]
+        return msg.text
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_http_server(root: str) -> http.server.ThreadingHTTPServer:
+    handler = functools.partial(_QuietHandler, directory=root)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, name="loadtest-http", daemon=True).start()
+    return server
+
+
+def parse_mix(spec: str) -> Dict[str, int]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def peak_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+async def run(args) -> Dict:
+    # imported here: STORAGE_DIR must be set before app.config is loaded
+    from . import bot
+    from .db import alloc_id, put_item
+    from .perf import monitor, percentile
+
+    handlers = {
+        "get": bot.get_cmd,
+        "ls": bot.ls_cmd,
+        "files": bot.files_cmd,
+        "mv": bot.mv_cmd,
+        "zip": bot.zip_cmd,
+        "up": bot.up_cmd,
+    }
+    mix = parse_mix(args.mix)
+    unknown = set(mix) - set(handlers)
+    if unknown:
+        raise SystemExit(f"unknown commands in --mix: {', '.join(sorted(unknown))}")
+
+    rnd = random.Random(args.seed)
+    storage = os.environ["STORAGE_DIR"]
+
+    # files served over HTTP for /get
+    srv_root = os.path.join(os.path.dirname(storage), "http")
+    os.makedirs(srv_root, exist_ok=True)
+    for i in range(args.urls):
+        with open(os.path.join(srv_root, f"file_{i}.bin"), "wb") as f:
+            f.write(os.urandom(args.file_kb * 1024))
+    server = start_http_server(srv_root)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    # seed items so /mv, /zip and /up have something to work on; item ids are
+    # tracked here (plus those created during the run) so picking one never
+    # loads the DB on the loop while measured handlers are running
+    item_ids: List[int] = []
+    for folder in ("seed_a", "seed_b"):
+        os.makedirs(os.path.join(storage, folder), exist_ok=True)
+    for i in range(args.items):
+        rel = os.path.join("seed_a", f"seed_{i}.txt")
+        with open(os.path.join(storage, rel), "w", encoding="utf-8") as f:
+            f.write(f"seed {i}\n" * 200)
+        item_id = alloc_id()
+        put_item(item_id, rel, os.path.basename(rel), os.path.getsize(os.path.join(storage, rel)))
+        item_ids.append(item_id)
+
+    def make_command(name: str) -> str:
+        if name == "get":
+            return f"/get {base_url}/file_{rnd.randrange(args.urls)}.bin downloads"
+        if name == "ls":
+            return rnd.choice(["/ls", "/ls seed_a", "/ls seed_b"])
+        if name == "files":
+            return "/files"
+        if name == "zip":
+            return f"/zip {rnd.choice(['seed_a', 'seed_b'])} zips/z_{rnd.randrange(1 << 30)}.zip"
+        item_id = rnd.choice(item_ids)
+        if name == "mv":
+            return f"/mv {item_id} {rnd.choice(['seed_a', 'seed_b'])}"
+        return f"/up {item_id}"
+
+    names = list(mix)
+    weights = [mix[n] for n in names]
+    plan = rnd.choices(names, weights=weights, k=args.requests)
+    queue: asyncio.Queue = asyncio.Queue()
+    for name in plan:
+        queue.put_nowait(name)
+
+    client = FakeClient(args.latency_ms / 1000)
+    samples: Dict[str, List[float]] = {n: [] for n in names}
+    errors: Dict[str, int] = {n: 0 for n in names}
+
+    async def worker() -> None:
+        while True:
+            try:
+                name = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            msg = FakeMessage(client, make_command(name))
+            t0 = time.perf_counter()
+            try:
+                await handlers[name](client, msg)
+                failed = msg.last_text().startswith("❌")
+            except Exception:
+                failed = True
+            samples[name].append(time.perf_counter() - t0)
+            if failed:
+                errors[name] += 1
+            elif name in ("get", "zip"):
+                created = ITEM_ID_RE.search(msg.last_text())
+                if created:
+                    item_ids.append(int(created.group(1)))
+
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - started
+    monitor.stop()
+    server.shutdown()
+
+    all_samples = [s for v in samples.values() for s in v]
+    errors["all"] = sum(errors.values())
+    lags = list(monitor.lags)
+    return {
+        "requests": len(all_samples),
+        "concurrency": args.concurrency,
+        "elapsed_s": elapsed,
+        "throughput_rps": len(all_samples) / elapsed if elapsed else 0.0,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "api_calls": client.api_calls,
+        "loop_lag_ms": {
+            "p50": percentile(lags, 50) * 1000,
+            "p99": percentile(lags, 99) * 1000,
+            "max": monitor.lag_max * 1000,
+            "stalls": monitor.stall_count,
+        },
+        "commands": {
+            name: {
+                "n": len(vals),
+                "errors": errors[name],
+                "p50_ms": percentile(vals, 50) * 1000,
+                "p95_ms": percentile(vals, 95) * 1000,
+                "p99_ms": percentile(vals, 99) * 1000,
+            }
+            for name, vals in [("all", all_samples)] + sorted(samples.items())
+            if name == "all" or vals
+        },
+    }
+
+
+def print_report(result: Dict) -> None:
+    print(
+        f"{result['requests']} requests, concurrency {result['concurrency']}: "
+        f"{result['elapsed_s']:.2f}s, {result['throughput_rps']:.1f} req/s, "
+        f"peak RSS {result['peak_rss_bytes'] / (1024 * 1024):.1f} MiB"
+    )
+    lag = result["loop_lag_ms"]
+    print(f"loop lag: p50 {lag['p50']:.1f} ms, p99 {lag['p99']:.1f} ms, max {lag['max']:.1f} ms, stalls {lag['stalls']}")
+    print(f"{'command':<8} {'n':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, c in result["commands"].items():
+        print(f"{name:<8} {c['n']:>6} {c['errors']:>5} {c['p50_ms']:>9.1f} {c['p95_ms']:>9.1f} {c['p99_ms']:>9.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.loadtest", description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300, help="total commands to run")
+    parser.add_argument("--concurrency", type=int, default=8, help="commands in flight at once")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"command weights (default {DEFAULT_MIX})")
+    parser.add_argument("--urls", type=int, default=5, help="distinct URLs served for /get")
+    parser.add_argument("--file-kb", type=int, default=1024, help="size of each served file")
+    parser.add_argument("--items", type=int, default=200, help="items seeded in the DB before the run")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="simulated Telegram API round trip")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for the command plan")
+    parser.add_argument("--json", metavar="PATH", help="also write the results as JSON")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary storage dir")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="sasuke-loadtest-")
+    storage = os.path.join(workdir, "storage")
+    os.makedirs(storage)
+    os.environ["STORAGE_DIR"] = storage
+    for var in ("DB_PATH", "INDEX_PATH", "PERF_LOG_PATH", "HOT_DIR"):
+        os.environ.pop(var, None)
+    try:
+        result = asyncio.run(run(args))
+    finally:
+        if args.keep:
+            print(f"storage kept at {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
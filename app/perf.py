@@ -0,0 +1,167 @@
+import asyncio
+import functools
+import logging
+import logging.handlers
+import math
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, List, Optional, Sequence, Tuple
+
+from .config import PERF_INTERVAL_MS, PERF_LAG_MS, PERF_LOG_PATH, PERF_LOG_MB, PERF_SUMMARY_S
+
+logger = logging.getLogger("sasuke.perf")
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100); 0.0 for an empty sequence."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+def _short_stack(frames: List[traceback.FrameSummary]) -> List[str]:
+    """Frames from our own code plus the innermost one (the actual blocking call)."""
+    picked = [f for f in frames if f.filename.startswith(APP_DIR) and f.filename != os.path.abspath(__file__)]
+    if frames and (not picked or picked[-1] is not frames[-1]):
+        picked.append(frames[-1])
+    return [f"{os.path.basename(f.filename)}:{f.lineno} {f.name}()" for f in picked[-8:]]
+
+
+class PerfMonitor:
+    """Event-loop lag sampler, blocking-call catcher and per-handler timer.
+
+    A coroutine wakes up every `interval` seconds and records how late it
+    was. A watchdog thread checks that heartbeat; if the loop has not come
+    back for longer than `threshold` it grabs the loop thread's stack, which
+    is whatever synchronous call is hogging it.
+    """
+
+    def __init__(self, interval: float, threshold: float, history: int = 600):
+        self.interval = interval
+        self.threshold = threshold
+        self.lags: Deque[float] = deque(maxlen=history)
+        self.lag_max = 0.0
+        # (unix time, blocked seconds, short stack)
+        self.stalls: Deque[Tuple[float, float, List[str]]] = deque(maxlen=20)
+        self.stall_count = 0
+        self.handlers: Dict[str, Deque[float]] = {}
+        self.handler_counts: Dict[str, int] = {}
+        self.handler_max: Dict[str, float] = {}
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop = threading.Event()
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def start(self) -> None:
+        """Start sampling; must be called from inside the running loop."""
+        if self._task is not None:
+            return
+        _setup_log()
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._sample())
+        threading.Thread(target=self._watch, name="perf-watchdog", daemon=True).start()
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._stop.set()
+
+    async def _sample(self) -> None:
+        last_summary = time.monotonic()
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._beat = now
+            lag = max(0.0, now - start - self.interval)
+            self.lags.append(lag)
+            self.lag_max = max(self.lag_max, lag)
+            if now - last_summary >= PERF_SUMMARY_S:
+                last_summary = now
+                logger.info(self.summary_line())
+
+    def _watch(self) -> None:
+        reported = None
+        while not self._stop.wait(self.interval):
+            beat = self._beat
+            blocked = time.monotonic() - beat - self.interval
+            if blocked < self.threshold or reported == beat:
+                continue
+            reported = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            frames = traceback.extract_stack(frame) if frame else []
+            self.stall_count += 1
+            self.stalls.append((time.time(), blocked, _short_stack(frames)))
+            logger.warning(
+                "event loop blocked for >%.0f ms:\n%s",
+                blocked * 1000,
+                "".join(traceback.format_list(frames)),
+            )
+
+    # -- handlers ----------------------------------------------------------
+
+    def timed(self, fn):
+        """Decorator recording the wall time of an async handler."""
+        name = fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                self.record(name, time.perf_counter() - t0)
+
+        return wrapper
+
+    def record(self, name: str, seconds: float) -> None:
+        self.handlers.setdefault(name, deque(maxlen=500)).append(seconds)
+        self.handler_counts[name] = self.handler_counts.get(name, 0) + 1
+        self.handler_max[name] = max(self.handler_max.get(name, 0.0), seconds)
+
+    def handler_stats(self) -> List[Tuple[str, int, float, float, float]]:
+        """[(name, calls, p50, p95, max)] in seconds, slowest p95 first."""
+        out = []
+        for name, samples in self.handlers.items():
+            vals = list(samples)
+            out.append((name, self.handler_counts[name], percentile(vals, 50), percentile(vals, 95), self.handler_max[name]))
+        out.sort(key=lambda r: r[3], reverse=True)
+        return out
+
+    def summary_line(self) -> str:
+        lags = list(self.lags)
+        parts = [
+            f"lag p50={percentile(lags, 50) * 1000:.0f}ms p99={percentile(lags, 99) * 1000:.0f}ms "
+            f"max={self.lag_max * 1000:.0f}ms stalls={self.stall_count}"
+        ]
+        for name, calls, p50, p95, _ in self.handler_stats():
+            parts.append(f"{name} n={calls} p95={p95 * 1000:.0f}ms")
+        return " | ".join(parts)
+
+
+def _setup_log() -> None:
+    if logger.handlers:
+        return
+    os.makedirs(os.path.dirname(PERF_LOG_PATH) or ".", exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        PERF_LOG_PATH, maxBytes=PERF_LOG_MB * 1024 * 1024, backupCount=3, encoding="utf-8"
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+
+
+monitor = PerfMonitor(PERF_INTERVAL_MS / 1000, PERF_LAG_MS / 1000)
@@ -0,0 +1,214 @@
+import asyncio
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from typing import List, Optional, Tuple
+
+import requests
+
+from .config import MAX_DOWNLOAD_MB
+from .downloader import download_file, resolve_url
+
+CONTENT_RANGE_RE = re.compile(r"bytes\s+(\d+)-(\d+)/(\d+|\*)")
+
+# Enough for the end-of-central-directory record plus a typical comment
+TAIL_SIZE = 64 * 1024
+MAX_READAHEAD = 8 * 1024 * 1024
+
+
+class RangeNotSupported(Exception):
+    """The server ignored our Range header (answered 200 instead of 206)."""
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """Read-only, seekable file over HTTP Range requests.
+
+    Enough for zipfile: it reads the central directory from the end of the
+    archive and then only the local header + data of the members it opens.
+    Sequential reads grow the fetch size (readahead) so inflating a big
+    member does not turn into thousands of tiny requests.
+    """
+
+    def __init__(self, url: str, session: Optional[requests.Session] = None, timeout: int = 30):
+        self._own_session = session is None
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.bytes_fetched = 0
+        self.requests = 0
+        self._pos = 0
+        self._buf = b""
+        self._buf_start = 0
+        self._readahead = TAIL_SIZE
+
+        # Probe with a suffix range: tells us Range support, the total size,
+        # and already brings the end-of-central-directory block.
+        resp = self.session.get(
+            url, headers={"Range": f"bytes=-{TAIL_SIZE}"}, stream=True, timeout=timeout, allow_redirects=True
+        )
+        m = CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+        if resp.status_code != 206 or not m or m.group(3) == "*":
+            resp.close()
+            self.close()
+            raise RangeNotSupported(url)
+        # follow redirects once, not on every range
+        self.url = resp.url
+        self.size = int(m.group(3))
+        self._buf = resp.content
+        self._buf_start = int(m.group(1))
+        self.bytes_fetched += len(self._buf)
+        self.requests += 1
+
+    def close(self) -> None:
+        if self._own_session and not self.closed:
+            self.session.close()
+        super().close()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def _fetch(self, start: int, length: int) -> None:
+        end = min(self.size, start + length) - 1
+        # stream=True: a server that suddenly answers 200 must not be read whole
+        resp = self.session.get(
+            self.url, headers={"Range": f"bytes={start}-{end}"}, stream=True, timeout=self.timeout
+        )
+        if resp.status_code != 206:
+            resp.close()
+            raise RangeNotSupported(self.url)
+        data = resp.content
+        if not data:
+            raise OSError(f"Empty range response for bytes {start}-{end}")
+        sequential = start == self._buf_start + len(self._buf)
+        self._buf = data
+        self._buf_start = start
+        self.bytes_fetched += len(self._buf)
+        self.requests += 1
+        self._readahead = min(MAX_READAHEAD, self._readahead * 2) if sequential else TAIL_SIZE
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = self.size - self._pos
+        size = min(size, self.size - self._pos)
+        if size <= 0:
+            return b""
+        out = bytearray()
+        while size > 0:
+            off = self._pos - self._buf_start
+            if not 0 <= off < len(self._buf):
+                self._fetch(self._pos, max(size, self._readahead))
+                off = 0
+            chunk = self._buf[off:off + size]
+            out += chunk
+            self._pos += len(chunk)
+            size -= len(chunk)
+        return bytes(out)
+
+    def readinto(self, b) -> int:
+        data = self.read(len(b))
+        b[:len(data)] = data
+        return len(data)
+
+
+def _entries(zf: zipfile.ZipFile) -> List[Tuple[str, int, int, bool]]:
+    return [(i.filename, i.file_size, i.compress_size, i.is_dir()) for i in zf.infolist()]
+
+
+def _extract(zf: zipfile.ZipFile, member: str, dest_path: str) -> int:
+    info = zf.getinfo(member)
+    limit = MAX_DOWNLOAD_MB * 1024 * 1024
+    if info.file_size > limit:
+        raise ValueError(f"Member too large: {info.file_size} bytes (limit {limit})")
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    tmp_path = dest_path + ".part"
+    try:
+        with zf.open(info) as src, open(tmp_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1024 * 256)
+        os.replace(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return info.file_size
+
+
+def _ranged_list(url: str) -> Tuple[List[Tuple[str, int, int, bool]], int]:
+    with HTTPRangeFile(url) as rf, zipfile.ZipFile(rf) as zf:
+        return _entries(zf), rf.bytes_fetched
+
+
+def _ranged_extract(url: str, member: str, dest_path: str) -> Tuple[int, int]:
+    with HTTPRangeFile(url) as rf, zipfile.ZipFile(rf) as zf:
+        return _extract(zf, member, dest_path), rf.bytes_fetched
+
+
+async def _full_download(url: str, progress_cb=None) -> str:
+    fd, tmp_zip = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        await download_file(url, tmp_zip, progress_cb=progress_cb, resolve=False)
+    except BaseException:
+        os.remove(tmp_zip)
+        raise
+    return tmp_zip
+
+
+async def list_remote_zip(url: str, progress_cb=None) -> Tuple[List[Tuple[str, int, int, bool]], Optional[int]]:
+    """List a remote ZIP. Returns ([(name, size, compressed_size, is_dir)], bytes_read).
+
+    bytes_read is None when the server has no Range support and the whole
+    archive had to be downloaded.
+    """
+    url = await resolve_url(url)
+    try:
+        return await asyncio.to_thread(_ranged_list, url)
+    except RangeNotSupported:
+        pass
+    tmp_zip = await _full_download(url, progress_cb)
+    try:
+        with zipfile.ZipFile(tmp_zip) as zf:
+            return _entries(zf), None
+    finally:
+        os.remove(tmp_zip)
+
+
+async def fetch_remote_member(url: str, member: str, dest_path: str, progress_cb=None) -> Tuple[int, Optional[int]]:
+    """Download and inflate one member of a remote ZIP into dest_path.
+
+    Returns (member_size, bytes_read); bytes_read is None on the
+    full-download fallback.
+    """
+    url = await resolve_url(url)
+    try:
+        return await asyncio.to_thread(_ranged_extract, url, member, dest_path)
+    except RangeNotSupported:
+        pass
+    tmp_zip = await _full_download(url, progress_cb)
+    try:
+
+        def _local() -> int:
+            with zipfile.ZipFile(tmp_zip) as zf:
+                return _extract(zf, member, dest_path)
+
+        return await asyncio.to_thread(_local), None
+    finally:
+        os.remove(tmp_zip)
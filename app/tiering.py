@@ -0,0 +1,304 @@
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, BinaryIO, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # optional: without it nothing gets compressed
+    zstandard = None
+
+from .config import (
+    HOT_CACHE_MB,
+    HOT_DIR,
+    STORAGE_DIR,
+    TIER_ENABLED,
+    TIER_IDLE_DAYS,
+    TIER_INTERVAL_MIN,
+    TIER_LEVEL,
+    TIER_MIN_KB,
+    TIER_MIN_SAVING,
+)
+from .db import get_item, list_items, put_item, update_item
+from .perf import logger
+
+ZST_SUFFIX = ".zst"
+SAMPLE_BYTES = 1024 * 1024
+
+# held while a file is swapped between its plain and .zst form
+_swap_lock = threading.Lock()
+_task: Optional[asyncio.Task] = None
+
+
+def is_compressed(item: Dict[str, Any]) -> bool:
+    return item.get("codec") == "zstd"
+
+
+def stored_rel(item: Dict[str, Any]) -> str:
+    """Path (relative to storage) of the bytes actually on disk."""
+    path = item.get("path", "")
+    return path + ZST_SUFFIX if is_compressed(item) else path
+
+
+def stored_size(item: Dict[str, Any]) -> int:
+    return int(item.get("stored_size", item.get("size", 0)))
+
+
+def open_stored(abs_path: str) -> BinaryIO:
+    """Open a .zst file as a stream of the original bytes."""
+    return zstandard.ZstdDecompressor().stream_reader(open(abs_path, "rb"), closefd=True)
+
+
+def open_item(item: Dict[str, Any]) -> BinaryIO:
+    """Readable stream of the item's original content, compressed or not."""
+    abs_path = os.path.join(STORAGE_DIR, stored_rel(item))
+    if is_compressed(item):
+        return open_stored(abs_path)
+    return open(abs_path, "rb")
+
+
+# ---------------------------------------------------------------------------
+# Hot set: decompressed copies of cold items that were read recently
+# ---------------------------------------------------------------------------
+
+
+# item id -> lock held while its hot copy is written, and how many callers
+# currently use that copy (pinned copies are never evicted)
+_hot_locks: Dict[int, threading.Lock] = {}
+_hot_pins: Dict[int, int] = {}
+_hot_guard = threading.Lock()
+
+
+def _hot_path(item_id: int, item: Dict[str, Any]) -> str:
+    return os.path.join(HOT_DIR, str(item_id), item.get("name") or os.path.basename(item.get("path", "")))
+
+
+def drop_hot(item_id: int) -> None:
+    shutil.rmtree(os.path.join(HOT_DIR, str(item_id)), ignore_errors=True)
+
+
+def _evict_hot(keep: str) -> None:
+    limit = HOT_CACHE_MB * 1024 * 1024
+    with _hot_guard:
+        pinned = {str(i) for i in _hot_pins}
+    entries = []
+    for root, _, files in os.walk(HOT_DIR):
+        if os.path.basename(root) in pinned:
+            continue
+        for fn in files:
+            fp = os.path.join(root, fn)
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, fp))
+    total = sum(e[1] for e in entries)
+    # least recently used first
+    for _, size, fp in sorted(entries):
+        if total <= limit:
+            break
+        if fp == keep:
+            continue
+        shutil.rmtree(os.path.dirname(fp), ignore_errors=True)
+        total -= size
+
+
+def local_path(item_id: int, item: Dict[str, Any]) -> str:
+    """A plain file with the item's content, for callers that need a real path (uploads).
+
+    Cold items are decompressed into the hot cache (HOT_DIR) and served from
+    there until evicted. The copy stays pinned until release_local(item_id).
+    """
+    if not is_compressed(item):
+        return os.path.join(STORAGE_DIR, item.get("path", ""))
+    with _hot_guard:
+        lock = _hot_locks.setdefault(item_id, threading.Lock())
+        _hot_pins[item_id] = _hot_pins.get(item_id, 0) + 1
+    try:
+        with lock:
+            hot = _hot_path(item_id, item)
+            if os.path.exists(hot) and os.path.getsize(hot) == int(item.get("size", 0)):
+                os.utime(hot)
+                return hot
+            os.makedirs(os.path.dirname(hot), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(hot), suffix=".part")
+            try:
+                with open_item(item) as src, os.fdopen(fd, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 256)
+                os.replace(tmp, hot)
+            except BaseException:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+                raise
+    except BaseException:
+        release_local(item_id)
+        raise
+    _evict_hot(keep=hot)
+    return hot
+
+
+def release_local(item_id: int) -> None:
+    """Unpin the hot copy handed out by local_path()."""
+    with _hot_guard:
+        n = _hot_pins.get(item_id, 0) - 1
+        if n > 0:
+            _hot_pins[item_id] = n
+        else:
+            _hot_pins.pop(item_id, None)
+            _hot_locks.pop(item_id, None)
+
+
+# ---------------------------------------------------------------------------
+# Cold tier
+# ---------------------------------------------------------------------------
+
+
+def path_taken(abs_path: str) -> bool:
+    """True if abs_path is used, in plain form or by a cold item stored as .zst."""
+    return os.path.exists(abs_path) or os.path.exists(abs_path + ZST_SUFFIX)
+
+
+def move_item(item_id: int, dst_rel: str) -> Optional[Dict[str, Any]]:
+    """Move/rename an item to dst_rel (relative to storage).
+
+    Cold items stay cold: their .zst file is renamed as is, keeping codec,
+    stored_size and the original size in the DB. Raises FileExistsError if
+    dst_rel is already used in either form (two items sharing X and X.zst
+    would let a later tier pass overwrite one with the other).
+    """
+    dst_rel = os.path.normpath(dst_rel)
+    with _swap_lock:
+        item = get_item(item_id)
+        if not item:
+            return None
+        if os.path.normpath(item["path"]) == dst_rel:
+            return item
+        compressed = is_compressed(item)
+        dst_abs = os.path.join(STORAGE_DIR, dst_rel)
+        if path_taken(dst_abs):
+            raise FileExistsError(f"{dst_rel} already exists")
+        os.makedirs(os.path.dirname(dst_abs), exist_ok=True)
+        os.replace(
+            os.path.join(STORAGE_DIR, stored_rel(item)),
+            dst_abs + ZST_SUFFIX if compressed else dst_abs,
+        )
+        size = int(item.get("size", 0)) if compressed else os.path.getsize(dst_abs)
+        put_item(item_id, dst_rel, os.path.basename(dst_rel), size)
+    if compressed:
+        # the hot copy is named after the item
+        drop_hot(item_id)
+    return get_item(item_id)
+
+
+def _worth_compressing(abs_path: str) -> bool:
+    with open(abs_path, "rb") as f:
+        sample = f.read(SAMPLE_BYTES)
+    if not sample:
+        return False
+    packed = zstandard.ZstdCompressor(level=TIER_LEVEL).compress(sample)
+    return len(packed) <= len(sample) * (1 - TIER_MIN_SAVING)
+
+
+def compress_item(item_id: int, item: Dict[str, Any]) -> int:
+    """Compress one item in place. Returns bytes saved (0 if skipped)."""
+    abs_path = os.path.join(STORAGE_DIR, item["path"])
+    try:
+        before = os.stat(abs_path)
+    except OSError:
+        return 0
+    if before.st_size < TIER_MIN_KB * 1024:
+        return 0
+    if not _worth_compressing(abs_path):
+        update_item(item_id, incompressible=True)
+        return 0
+
+    zst_path = abs_path + ZST_SUFFIX
+    tmp = zst_path + ".part"
+    with open(abs_path, "rb") as src, open(tmp, "wb") as dst:
+        zstandard.ZstdCompressor(level=TIER_LEVEL).copy_stream(src, dst, size=before.st_size)
+    packed = os.path.getsize(tmp)
+    if packed > before.st_size * (1 - TIER_MIN_SAVING):
+        os.remove(tmp)
+        update_item(item_id, incompressible=True)
+        return 0
+
+    with _swap_lock:
+        # the item may have been read, moved or replaced meanwhile
+        current = get_item(item_id)
+        try:
+            after = os.stat(abs_path)
+        except OSError:
+            after = None
+        if (
+            not current
+            or current.get("path") != item["path"]
+            or current.get("atime") != item.get("atime")
+            or after is None
+            or (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns)
+        ):
+            os.remove(tmp)
+            return 0
+        os.replace(tmp, zst_path)
+        update_item(item_id, codec="zstd", stored_size=packed)
+        os.remove(abs_path)
+    return before.st_size - packed
+
+
+def _last_used(item: Dict[str, Any], now: float) -> float:
+    if "atime" in item:
+        return float(item["atime"])
+    if "added" in item:
+        return float(item["added"])
+    # legacy records (written before atime/added existed): fall back to the file's mtime
+    try:
+        return os.path.getmtime(os.path.join(STORAGE_DIR, item.get("path", "")))
+    except OSError:
+        return now
+
+
+def tier_pass(now: Optional[float] = None) -> Tuple[int, int]:
+    """Compress every idle, compressible item. Returns (items_compressed, bytes_saved)."""
+    if zstandard is None:
+        return 0, 0
+    now = now or time.time()
+    idle_s = TIER_IDLE_DAYS * 86400
+    count = saved = 0
+    for k, item in list(list_items().items()):
+        if is_compressed(item) or item.get("incompressible"):
+            continue
+        if now - _last_used(item, now) < idle_s:
+            continue
+        gained = compress_item(int(k), dict(item))
+        if gained:
+            count += 1
+            saved += gained
+    return count, saved
+
+
+async def tiering_loop() -> None:
+    while True:
+        try:
+            count, saved = await asyncio.to_thread(tier_pass)
+            if count:
+                logger.info("tier pass: %d items compressed, %d bytes saved", count, saved)
+        except Exception:
+            logger.exception("tier pass failed")
+        await asyncio.sleep(TIER_INTERVAL_MIN * 60)
+
+
+def start_tiering() -> None:
+    """Start the background tier pass; must be called from inside the running loop."""
+    global _task
+    if _task is not None or not TIER_ENABLED or zstandard is None:
+        return
+    _task = asyncio.get_running_loop().create_task(tiering_loop())
+
+
+def stop_tiering() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        _task = None
@@ -20,6 +20,18 @@ def pretty_size(num_bytes: int) -> str:
         return f"{num_bytes:.1f}PB"
 
 
+SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+
+
+def parse_size(text: str) -> int:
+    """Parse '500', '10K', '1.5G', '700MB' -> bytes (binary units)."""
+    m = SIZE_RE.match(text or "")
+    if not m:
+        raise ValueError(f"Invalid size: {text}")
+    return int(float(m.group(1)) * SIZE_UNITS[m.group(2).upper()])
+
+
 SAFE_NAME_RE = re.compile(r"[^a-zA-Z0-9._-]+")
 
 
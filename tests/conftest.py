@@ -0,0 +1,19 @@
+import pytest
+
+from app import db, tiering, utils
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    """Point the DB, index, storage and hot cache at a fresh temp dir."""
+    root = tmp_path / "storage"
+    root.mkdir()
+    for mod in (db, tiering, utils):
+        monkeypatch.setattr(mod, "STORAGE_DIR", str(root))
+    monkeypatch.setattr(db, "DB_PATH", str(root / "db.json"))
+    monkeypatch.setattr(db, "INDEX_PATH", str(tmp_path / "index.sqlite3"))
+    monkeypatch.setattr(db, "_index_conn", None)
+    monkeypatch.setattr(tiering, "HOT_DIR", str(tmp_path / "hot"))
+    yield root
+    if db._index_conn is not None:
+        db._index_conn.close()
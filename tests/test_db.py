@@ -0,0 +1,42 @@
+import threading
+
+from app import db
+
+
+def test_concurrent_updates_are_not_lost(storage):
+    ids = [db.alloc_id() for _ in range(30)]
+    for i in ids:
+        db.put_item(i, f"f{i}", f"f{i}", 1)
+
+    def set_all(**fields):
+        for i in ids:
+            db.update_item(i, **fields)
+
+    threads = [
+        threading.Thread(target=set_all, kwargs={"codec": "zstd"}),
+        threading.Thread(target=set_all, kwargs={"atime": 1.0}),
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for item in db.list_items().values():
+        assert item["codec"] == "zstd"
+        assert item["atime"] == 1.0
+
+
+def test_concurrent_alloc_id_is_unique(storage):
+    got = []
+
+    def alloc():
+        for _ in range(25):
+            got.append(db.alloc_id())
+
+    threads = [threading.Thread(target=alloc) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(got) == list(range(100))
@@ -0,0 +1,14 @@
+from app.perf import percentile
+
+
+def test_percentile_nearest_rank():
+    assert percentile([1, 2, 3, 4, 5, 6], 50) == 3
+    assert percentile(list(range(1, 11)), 50) == 5
+    assert percentile(list(range(1, 11)), 95) == 10
+    assert percentile(list(range(1, 101)), 99) == 99
+    assert percentile([10, 1, 5], 0) == 1
+    assert percentile([10, 1, 5], 100) == 10
+
+
+def test_percentile_empty():
+    assert percentile([], 50) == 0.0
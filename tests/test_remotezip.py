@@ -0,0 +1,128 @@
+import asyncio
+import http.server
+import io
+import os
+import re
+import threading
+import zipfile
+
+import pytest
+
+from app import remotezip
+
+BIG = os.urandom(2 * 1024 * 1024)
+WANTED = b"payload!" * 10_000
+
+
+def _archive(corrupt: bool = False) -> bytes:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("big.bin", BIG, compress_type=zipfile.ZIP_STORED)
+        for i in range(50):
+            zf.writestr(f"dir/f{i}.txt", f"hello {i}\n" * 100)
+        zf.writestr("want/me.txt", WANTED, compress_type=zipfile.ZIP_STORED)
+    data = bytearray(buf.getvalue())
+    if corrupt:
+        i = data.rindex(b"payload!")
+        data[i] ^= 0xFF
+    return bytes(data)
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        data = self.server.payload
+        m = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get("Range", ""))
+        if self.server.mode == "no-range" or not m:
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if m.group(1):
+            start, end = int(m.group(1)), min(int(m.group(2) or len(data) - 1), len(data) - 1)
+        else:
+            start, end = max(0, len(data) - int(m.group(2))), len(data) - 1
+        body = data[start:end + 1]
+        # "empty": answer the probe, then send 206s without a body
+        if self.server.mode == "empty" and m.group(1):
+            body = b""
+        self.send_response(206)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(data)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(payload: bytes, mode: str = "range") -> str:
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        server.payload = payload
+        server.mode = mode
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/a.zip"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_list_reads_only_the_central_directory(serve):
+    data = _archive()
+    entries, fetched = asyncio.run(remotezip.list_remote_zip(serve(data)))
+    names = [e[0] for e in entries]
+    assert names[0] == "big.bin" and names[-1] == "want/me.txt" and len(names) == 52
+    assert ("big.bin", len(BIG), len(BIG), False) in entries
+    assert fetched is not None and fetched < len(data) // 4
+
+
+def test_fetch_member_reads_only_that_member(serve, tmp_path):
+    data = _archive()
+    dest = tmp_path / "out" / "me.txt"
+    size, fetched = asyncio.run(remotezip.fetch_remote_member(serve(data), "want/me.txt", str(dest)))
+    assert size == len(WANTED)
+    assert dest.read_bytes() == WANTED
+    assert fetched < len(data) // 4
+
+
+def test_sequential_reads_grow_the_readahead(serve):
+    data = _archive()
+    with remotezip.HTTPRangeFile(serve(data)) as rf, zipfile.ZipFile(rf) as zf:
+        assert zf.read("big.bin") == BIG
+        # doubling readahead: a 2 MiB member in a handful of requests, not hundreds
+        assert rf.requests < 12
+    assert rf.closed
+
+
+def test_no_range_support_falls_back_to_full_download(serve, tmp_path):
+    url = serve(_archive(), mode="no-range")
+    with pytest.raises(remotezip.RangeNotSupported):
+        remotezip.HTTPRangeFile(url)
+    entries, fetched = asyncio.run(remotezip.list_remote_zip(url))
+    assert fetched is None and len(entries) == 52
+    dest = tmp_path / "me.txt"
+    size, fetched = asyncio.run(remotezip.fetch_remote_member(url, "want/me.txt", str(dest)))
+    assert fetched is None and dest.read_bytes() == WANTED
+
+
+def test_empty_range_body_raises_instead_of_looping(serve, tmp_path):
+    url = serve(_archive(), mode="empty")
+    dest = tmp_path / "me.txt"
+    with pytest.raises(OSError, match="Empty range response"):
+        remotezip._ranged_extract(url, "want/me.txt", str(dest))
+    assert os.listdir(tmp_path) == []
+
+
+def test_crc_error_leaves_no_partial_file(serve, tmp_path):
+    url = serve(_archive(corrupt=True))
+    dest = tmp_path / "me.txt"
+    with pytest.raises(zipfile.BadZipFile):
+        remotezip._ranged_extract(url, "want/me.txt", str(dest))
+    assert os.listdir(tmp_path) == []
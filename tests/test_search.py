@@ -0,0 +1,88 @@
+import os
+
+from app import db
+
+DAY = 86400.0
+
+
+def _add(item_id, path, size=100, added=1000 * DAY):
+    name = os.path.basename(path)
+    db.put_item(item_id, path, name, size)
+    db.update_item(item_id, added=added)
+    # put_item keeps an existing "added"; calling it again reindexes with it
+    db.put_item(item_id, path, name, size)
+
+
+def _ids(result):
+    return [item_id for item_id, _ in result[1]]
+
+
+def _seed():
+    _add(1, "docs/Annual_Report_2024.pdf", size=5_000_000, added=1000 * DAY)
+    _add(2, "docs/annual_budget.xlsx", size=20_000, added=1001 * DAY)
+    _add(3, "music/report_song.mp3", size=8_000_000, added=1002 * DAY)
+    _add(4, "docs/old/Annual_Report_2019.pdf", size=3_000_000, added=900 * DAY)
+
+
+def test_substring_matches_name_and_path_newest_first(storage):
+    _seed()
+    assert _ids(db.search_items("report")) == [3, 1, 4]
+    assert _ids(db.search_items("music")) == [3]
+    assert db.search_items("nothing-like-this") == (0, [])
+
+
+def test_every_term_must_match(storage):
+    _seed()
+    assert _ids(db.search_items("annual report")) == [1, 4]
+    assert _ids(db.search_items("REPORT annual 2019")) == [4]
+    assert _ids(db.search_items("annual song")) == []
+
+
+def test_short_terms_fall_back_to_scan(storage):
+    _seed()
+    assert _ids(db.search_items("mp")) == [3]
+    assert _ids(db.search_items("20 annual")) == [1, 4]
+
+
+def test_filters(storage):
+    _seed()
+    assert _ids(db.search_items("", ext="pdf")) == [1, 4]
+    assert _ids(db.search_items("", ext=".PDF")) == [1, 4]
+    assert _ids(db.search_items("annual", min_size=4_000_000)) == [1]
+    assert _ids(db.search_items("", max_size=100_000)) == [2]
+    assert _ids(db.search_items("", after=1000 * DAY, before=1002 * DAY)) == [2, 1]
+    assert _ids(db.search_items("annual", folder="docs")) == [2, 1, 4]
+    assert _ids(db.search_items("annual", folder="docs/old/")) == [4]
+    assert _ids(db.search_items("report", folder=".")) == [3, 1, 4]
+    # a folder prefix must end at a path separator
+    assert _ids(db.search_items("", folder="doc")) == []
+
+
+def test_limit_and_total(storage):
+    for i in range(30):
+        _add(i, f"batch/file_{i:02d}.txt", added=1000 * DAY + i)
+    total, rows = db.search_items("file", limit=5)
+    assert total == 30
+    assert [item_id for item_id, _ in rows] == [29, 28, 27, 26, 25]
+
+
+def test_index_follows_renames_and_deletes(storage):
+    _seed()
+    db.put_item(3, "music/renamed.mp3", "renamed.mp3", 8_000_000)
+    assert _ids(db.search_items("song")) == []
+    assert _ids(db.search_items("renamed")) == [3]
+    db.del_item(1)
+    assert _ids(db.search_items("annual report")) == [4]
+
+
+def test_stale_index_is_rebuilt_on_open(storage):
+    _seed()
+    # simulate a crash between save_db and _index_put on a rename
+    data = db.load_db()
+    data["items"]["3"].update(path="music/other.mp3", name="other.mp3")
+    db.save_db(data)
+    db._index_conn.close()
+    db._index_conn = None
+    db.open_index()
+    assert _ids(db.search_items("other")) == [3]
+    assert _ids(db.search_items("song")) == []
@@ -0,0 +1,124 @@
+import os
+import threading
+import time
+
+import pytest
+
+from app import db, fileops, tiering
+
+pytest.importorskip("zstandard")
+
+TEXT = b"hello world, compress me please\n" * 40_000
+LATER = time.time() + 60 * 86400
+
+
+def _add(storage, item_id, rel, data, atime=0.0):
+    path = storage / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    db.put_item(item_id, rel, os.path.basename(rel), len(data))
+    db.update_item(item_id, atime=atime)
+
+
+def _read(item_id):
+    with tiering.open_item(db.get_item(item_id)) as f:
+        return f.read()
+
+
+def test_tier_pass_compresses_only_idle_compressible_items(storage):
+    _add(storage, 1, "a/idle.txt", TEXT)
+    _add(storage, 2, "a/recent.txt", TEXT, atime=LATER)
+    _add(storage, 3, "a/random.bin", os.urandom(len(TEXT)))
+
+    count, saved = tiering.tier_pass(now=LATER)
+
+    assert count == 1 and 0 < saved < len(TEXT)
+    assert sorted(os.listdir(storage / "a")) == ["idle.txt.zst", "random.bin", "recent.txt"]
+    item = db.get_item(1)
+    assert item["codec"] == "zstd" and item["size"] == len(TEXT)
+    assert item["stored_size"] == os.path.getsize(storage / "a/idle.txt.zst")
+    assert db.get_item(3)["incompressible"] is True
+    assert _read(1) == TEXT
+
+
+def test_legacy_items_use_file_mtime(storage):
+    _add(storage, 1, "old.txt", TEXT)
+    data = db.load_db()
+    for field in ("atime", "added"):
+        data["items"]["1"].pop(field)
+    db.save_db(data)
+    old = time.time() - 60 * 86400
+    os.utime(storage / "old.txt", (old, old))
+
+    assert tiering.tier_pass()[0] == 1
+    assert tiering.is_compressed(db.get_item(1))
+
+
+def test_local_path_serves_concurrent_readers(storage, monkeypatch):
+    monkeypatch.setattr(tiering, "HOT_CACHE_MB", 0)
+    _add(storage, 1, "f.txt", TEXT)
+    tiering.tier_pass(now=LATER)
+    item = db.get_item(1)
+    paths, errors = [], []
+
+    def read():
+        try:
+            paths.append(tiering.local_path(1, item))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=read) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == [] and len(set(paths)) == 1
+    hot = paths[0]
+    # pinned copies survive eviction even with a zero-size cache
+    assert os.listdir(os.path.dirname(hot)) == ["f.txt"]
+    with open(hot, "rb") as f:
+        assert f.read() == TEXT
+    for _ in paths:
+        tiering.release_local(1)
+    tiering._evict_hot(keep="")
+    assert not os.path.exists(hot)
+
+
+def test_move_item_keeps_cold_items_compressed(storage):
+    _add(storage, 1, "a/f.txt", TEXT)
+    tiering.tier_pass(now=LATER)
+    hot = tiering.local_path(1, db.get_item(1))
+    tiering.release_local(1)
+
+    moved = tiering.move_item(1, "b/g.txt")
+
+    assert moved["path"] == "b/g.txt" and moved["codec"] == "zstd"
+    assert moved["size"] == len(TEXT)
+    assert os.listdir(storage / "a") == []
+    assert os.listdir(storage / "b") == ["g.txt.zst"]
+    assert not os.path.exists(hot)
+    assert _read(1) == TEXT
+
+
+def test_move_item_refuses_names_taken_in_either_form(storage):
+    _add(storage, 1, "cold.txt", TEXT)
+    tiering.tier_pass(now=LATER)
+    _add(storage, 2, "plain.txt", b"plain", atime=LATER)
+
+    with pytest.raises(FileExistsError):
+        tiering.move_item(1, "plain.txt")
+    with pytest.raises(FileExistsError):
+        tiering.move_item(2, "cold.txt")
+    assert sorted(os.listdir(storage)) == ["cold.txt.zst", "db.json", "plain.txt"]
+    # renaming to its own path is a no-op
+    assert tiering.move_item(2, "plain.txt")["path"] == "plain.txt"
+
+
+def test_list_dir_shows_cold_items_as_the_original(storage):
+    _add(storage, 1, "d/f.txt", TEXT)
+    tiering.tier_pass(now=LATER)
+    cold = {str(storage / "d/f.txt.zst"): len(TEXT)}
+
+    assert fileops.list_dir("d", cold) == [("f.txt", "d/f.txt", len(TEXT), False)]
+    assert ("d", "d", len(TEXT), True) in fileops.list_dir("", cold)